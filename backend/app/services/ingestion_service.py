@@ -2,7 +2,7 @@ import sys
 import os
 import argparse
 from collections import Counter
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from sqlmodel import Session, select
 from app.schemas.stats_models import EpisodeStats
 
@@ -241,6 +241,92 @@ def ingest_episode_stats(
     return series
 
 
+def build_episode_row(
+    stats: Dict[str, Any], series_id: int, episode_num: int
+) -> Dict[str, Any]:
+    """Validates a stats dictionary into a plain row for the episode table.
+
+    Args:
+        stats (Dict[str, Any]): The statistics dictionary.
+        series_id (int): The ID of the parent series.
+        episode_num (int): The episode number.
+
+    Returns:
+        Dict[str, Any]: Column values for an AnimeEpisode row.
+    """
+    validated_data = EpisodeStats(**stats).model_dump(mode="json")
+
+    row = {
+        k: v
+        for k, v in validated_data.items()
+        if k in AnimeEpisode.model_fields and k != "id"
+    }
+    row["series_id"] = series_id
+    row["episode_number"] = episode_num
+    return row
+
+
+def ingest_series_stats(
+    session: Session,
+    episodes: List[Tuple[int, Dict[str, Any]]],
+    series_title: str,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> AnimeSeries:
+    """Writes all episodes of a series to the DB in a single transaction.
+
+    Bulk counterpart of `ingest_episode_stats`: episodes are converted to plain
+    rows and written with bulk insert/update mappings instead of one ORM
+    object and commit per episode.
+
+    Args:
+        session (Session): Database session.
+        episodes (List[Tuple[int, Dict[str, Any]]]): (episode number, stats) pairs.
+            If an episode number repeats, the last entry wins.
+        series_title (str): The Japanese title of the series.
+        metadata (Optional[Dict[str, Any]]): Series metadata.
+
+    Returns:
+        AnimeSeries: The updated series object.
+    """
+    # Find or Create Series
+    series = session.exec(
+        select(AnimeSeries).where(AnimeSeries.title_jp == series_title)
+    ).first()
+    if not series:
+        series = AnimeSeries(title_jp=series_title)
+        session.add(series)
+    _update_series_metadata(series, metadata)
+    session.flush()
+
+    # Existing episodes are updated in place, new ones inserted
+    existing_ids = dict(
+        session.exec(
+            select(AnimeEpisode.episode_number, AnimeEpisode.id).where(
+                AnimeEpisode.series_id == series.id
+            )
+        ).all()
+    )
+
+    inserts = []
+    updates = []
+    for episode_num, stats in dict(episodes).items():
+        row = build_episode_row(stats, series.id, episode_num)
+        if episode_num in existing_ids:
+            row["id"] = existing_ids[episode_num]
+            updates.append(row)
+        else:
+            inserts.append(row)
+
+    if inserts:
+        session.bulk_insert_mappings(AnimeEpisode, inserts)
+    if updates:
+        session.bulk_update_mappings(AnimeEpisode, updates)
+
+    session.commit()
+    session.refresh(series)
+    return series
+
+
 # Use for running on raw files manually
 if __name__ == "__main__":
     from app.services.subtitle_service import analyze_subtitle_file
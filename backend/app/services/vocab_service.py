@@ -1,9 +1,10 @@
-import json
 import os
+
+import msgpack
 from typing import List, Dict, Optional, Any
 
-# Path to the JSON file generated by fetch_vocab.py
-VOCAB_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "vocab.json")
+# Path to the MessagePack file generated by fetch_vocab.py
+VOCAB_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "vocab.msgpack")
 
 
 class VocabService:
@@ -20,19 +21,20 @@ class VocabService:
         return cls._instance
 
     def load_vocab(self):
-        """Loads the vocabulary JSON into memory if not already loaded."""
+        """Loads the vocabulary file into memory if not already loaded."""
         if self._loaded:
             return
 
         print("Loading vocabulary into memory...")
         if not os.path.exists(VOCAB_FILE):
-            print("Warning: vocab.json not found. Run fetch_vocab.py first.")
+            print("Warning: vocab.msgpack not found. Run fetch_vocab.py first.")
             return
 
         try:
-            with open(VOCAB_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (IOError, json.JSONDecodeError) as e:
+            with open(VOCAB_FILE, "rb") as f:
+                # Sequence of MessagePack maps written by fetch_vocab.py
+                data = list(msgpack.Unpacker(f, raw=False))
+        except (IOError, ValueError, msgpack.UnpackException) as e:
             print(f"Error loading vocab file: {e}")
             return
 
@@ -4,6 +4,8 @@ import json
 import argparse
 from typing import Any
 
+import orjson
+
 # Add project root to path (go up from scripts/pipeline/ to root)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 sys.path.insert(0, PROJECT_ROOT)
@@ -13,24 +15,72 @@ RAW_DIR = os.path.join(DATA_DIR, "raw_subtitles")
 OUTPUT_DIR = os.path.join(DATA_DIR, "analyzed_stats")
 
 
+def _has_sets(data: Any) -> bool:
+    """Checks whether a nested structure contains any sets.
+
+    Args:
+        data (Any): The input data structure.
+
+    Returns:
+        bool: True if a set is found anywhere in the structure.
+    """
+    if isinstance(data, set):
+        return True
+    if isinstance(data, dict):
+        return any(_has_sets(v) for v in data.values())
+    if isinstance(data, list):
+        return any(_has_sets(v) for v in data)
+    return False
+
+
 def ensure_json_serializable(data: Any) -> Any:
     """Recursively converts sets to lists and ensures basic types for JSON serialization.
 
+    The structure is only rebuilt when it actually contains a set; otherwise
+    it is returned as-is.
+
     Args:
         data (Any): The input data structure.
 
     Returns:
         Any: The JSON-serializable data structure.
     """
+    if not _has_sets(data):
+        return data
+    return _convert_sets(data)
+
+
+def _convert_sets(data: Any) -> Any:
+    """Recursively copies a structure, converting sets to lists.
+
+    Args:
+        data (Any): The input data structure.
+
+    Returns:
+        Any: The converted data structure.
+    """
     if isinstance(data, dict):
-        return {k: ensure_json_serializable(v) for k, v in data.items()}
+        return {k: _convert_sets(v) for k, v in data.items()}
     elif isinstance(data, list):
-        return [ensure_json_serializable(v) for v in data]
+        return [_convert_sets(v) for v in data]
     elif isinstance(data, set):
         return list(data)
     return data
 
 
+def write_json(path: str, data: Any, indent: bool = False):
+    """Serializes data with orjson and writes it to disk in a single call.
+
+    Args:
+        path (str): Destination file path.
+        data (Any): JSON-serializable data.
+        indent (bool): If True, pretty-prints with 2-space indentation.
+    """
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    with open(path, "wb") as f:
+        f.write(payload)
+
+
 def process_series(folder_name: str, force: bool = False):
     """Analyzes all subtitle files in a series folder and saves stats to JSON.
 
@@ -61,10 +111,7 @@ def process_series(folder_name: str, force: bool = False):
     os.makedirs(output_series_path, exist_ok=True)
 
     # Copy metadata to output for the ingester to use later
-    with open(
-        os.path.join(output_series_path, "metadata.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    write_json(os.path.join(output_series_path, "metadata.json"), metadata, indent=True)
 
     print(f"\nProcessing Series: {metadata.get('title_jp', folder_name)}")
 
@@ -105,29 +152,32 @@ def process_series(folder_name: str, force: bool = False):
 
             clean_stats = ensure_json_serializable(stats)
 
-            with open(output_json_path, "w", encoding="utf-8") as f:
-                json.dump(clean_stats, f, ensure_ascii=False)  # Minified to save space
+            write_json(output_json_path, clean_stats)  # Minified to save space
             print(" Done.")
         else:
             print(" Failed (No content).")
 
 
-def main():
-    """Main entry point for generating stats."""
+def main(argv: list = None):
+    """Main entry point for generating stats.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+    """
     parser = argparse.ArgumentParser(
         description="Generate JSON stats from raw subtitles"
     )
     parser.add_argument("--all", action="store_true", help="Process all folders")
     parser.add_argument("--force", action="store_true", help="Overwrite existing stats")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not os.path.exists(RAW_DIR):
         print(f"No raw subtitles found at: {RAW_DIR}")
         print("Please create the directory and add subtitle files.")
         return
 
-    if not os.path.exists(os.path.join(DATA_DIR, "vocab.json")):
-        print(f"No vocab.json found at: {DATA_DIR}")
+    if not os.path.exists(os.path.join(DATA_DIR, "vocab.msgpack")):
+        print(f"No vocab.msgpack found at: {DATA_DIR}")
         print("Please run the vocabulary fetcher script first.")
         return
 
@@ -140,6 +190,7 @@ def main():
     else:
         # Interactive mode
         valid_folders = [f for f in folders if os.path.isdir(os.path.join(RAW_DIR, f))]
+        valid_folders_lc = [f.lower() for f in valid_folders]
         target_folders = []
 
         while True:
@@ -153,7 +204,11 @@ def main():
             if not search:
                 matches = valid_folders
             else:
-                matches = [f for f in valid_folders if search in f.lower()]
+                matches = [
+                    valid_folders[i]
+                    for i, lc in enumerate(valid_folders_lc)
+                    if search in lc
+                ]
 
             if not matches:
                 print("No matches found.")
@@ -1,14 +1,18 @@
 import os
 import sys
 import argparse
-import json
 import pickle
+import heapq
+from collections import deque
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import pandas as pd
+import torch
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 from spacy.lang.ja.stop_words import STOP_WORDS as JA_STOP_WORDS
 from huggingface_hub import hf_hub_download
+import orjson
 
 # Project paths
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -16,6 +20,7 @@ sys.path.insert(0, PROJECT_ROOT)
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 STATS_DIR = os.path.join(DATA_DIR, "analyzed_stats")
+MANIFEST_PATH = os.path.join(STATS_DIR, ".enrichment_manifest.json")
 LOCAL_MODEL_CACHE = os.path.join(os.path.dirname(__file__), ".model_cache")
 
 # Configuration
@@ -23,6 +28,16 @@ HF_REPO_ID = "kjar/anime-difficulty"
 HF_FILENAME = "anime_difficulty_model.pkl"
 SCALING_FLOOR = 22.0
 SCALING_CEILING = 33.0
+BATCH_SIZE = 1024  # Episodes buffered across series per inference flush
+ENCODE_BATCH_SIZE = 128  # SentenceTransformer mini-batch size over length-sorted texts
+IO_WORKERS = 8  # Threads reading series folders ahead of inference
+WRITE_WORKERS = 4  # Threads writing enriched episodes back to disk
+WRITE_BACKLOG_BATCHES = 2  # Batches of writes allowed to queue before inference waits
+
+# Words excluded from lexical signatures: stop words, lone hiragana and punctuation
+_PUNCT = frozenset({"、", "。", "！", "？", "「", "」"})
+_HIRAGANA = frozenset(chr(c) for c in range(0x3040, 0x30A0))
+_SKIP_WORDS = frozenset(JA_STOP_WORDS) | _HIRAGANA | _PUNCT
 
 
 def download_model(repo_id: str, filename: str, cache_dir: str = LOCAL_MODEL_CACHE) -> str:
@@ -45,6 +60,63 @@ def download_model(repo_id: str, filename: str, cache_dir: str = LOCAL_MODEL_CAC
     )
 
 
+def read_json(path: str):
+    """Reads and parses a JSON file.
+
+    Args:
+        path (str): Source file path.
+
+    Returns:
+        Any: The parsed data.
+    """
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def write_json(path: str, data: dict):
+    """Serializes data and atomically replaces the file at `path`.
+
+    The payload goes to a sibling temp file first, so a crash mid-write
+    never leaves a truncated stats file behind.
+
+    Args:
+        path (str): Destination file path.
+        data (dict): JSON-serializable data.
+    """
+    payload = orjson.dumps(
+        data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_enriched(path: str, probe_bytes: int = 4096) -> bool:
+    """Checks whether an episode file already has ML scores without parsing it.
+
+    The scores are appended to the episode dict on enrichment, so they are
+    serialized as the last keys of the file and only the tail needs reading.
+
+    Args:
+        path (str): Path to the episode JSON file.
+        probe_bytes (int, optional): Number of trailing bytes to inspect. Defaults to 4096.
+
+    Returns:
+        bool: True if both score keys were found in the probed bytes.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - probe_bytes))
+        tail = f.read()
+    return b'"raw_ml_difficulty"' in tail and b'"ml_difficulty"' in tail
+
+
 def get_lexical_signature(freq_map: dict, top_n: int = 200) -> str:
     """Extracts top N non-stopword content words from a frequency map.
 
@@ -58,15 +130,14 @@ def get_lexical_signature(freq_map: dict, top_n: int = 200) -> str:
     if not freq_map:
         return ""
 
-    clean_map = {}
-    for word, count in freq_map.items():
-        if word in JA_STOP_WORDS: continue
-        if len(word) == 1 and 0x3040 <= ord(word) <= 0x309F: continue
-        if word in {"、", "。", "！", "？", "「", "」"}: continue
-        clean_map[word] = count
+    clean_items = (
+        (word, count) for word, count in freq_map.items()
+        if word not in _SKIP_WORDS
+    )
 
-    sorted_words = sorted(clean_map.items(), key=lambda x: x[1], reverse=True)
-    return " ".join([w[0] for w in sorted_words[:top_n]])
+    # Equivalent to sorted(..., reverse=True)[:top_n], including tie order
+    top_words = heapq.nlargest(top_n, clean_items, key=itemgetter(1))
+    return " ".join([w[0] for w in top_words])
 
 
 def json_to_features(ep_stats: dict, metadata: dict) -> dict:
@@ -100,11 +171,15 @@ def json_to_features(ep_stats: dict, metadata: dict) -> dict:
     target_ranks = [1000, 2000, 5000, 10000]
     vocab_curve = ep_stats.get("general_vocab_stats", [])
     if vocab_curve:
-        curve = sorted(vocab_curve, key=lambda x: x["rank"])
-        ranks = [p["rank"] for p in curve]
-        covs = [p["coverage"] for p in curve]
-        for tr in target_ranks:
-            row[f"general_coverage_{tr}"] = np.interp(tr, ranks, covs, left=0, right=100)
+        curve = np.fromiter(
+            ((p["rank"], p["coverage"]) for p in vocab_curve),
+            dtype=[("rank", "i8"), ("coverage", "f8")],
+            count=len(vocab_curve),
+        )
+        curve.sort(order="rank")
+        vals = np.interp(target_ranks, curve["rank"], curve["coverage"], left=0, right=100)
+        for tr, val in zip(target_ranks, vals):
+            row[f"general_coverage_{tr}"] = val
     else:
         for tr in target_ranks: row[f"general_coverage_{tr}"] = 0
 
@@ -112,14 +187,22 @@ def json_to_features(ep_stats: dict, metadata: dict) -> dict:
     target_covs = [80, 85, 90, 95, 98]
     local_curve = ep_stats.get("local_vocab_stats", [])
     if local_curve:
-        curve = sorted(local_curve, key=lambda x: x["unique"])
-        uniques = [p["unique"] for p in curve]
-        covs = [p["coverage"] for p in curve]
-        for tc in target_covs:
-            if max(covs) >= tc:
-                row[f"local_words_for_{tc}"] = np.interp(tc, covs, uniques)
-            else:
-                row[f"local_words_for_{tc}"] = uniques[-1]
+        curve = np.fromiter(
+            ((p["unique"], p["coverage"]) for p in local_curve),
+            dtype=[("unique", "i8"), ("coverage", "f8")],
+            count=len(local_curve),
+        )
+        curve.sort(order="unique")
+        uniques, covs = curve["unique"], curve["coverage"]
+        # Coverage only grows with the unique-word count, so the last point is
+        # the best coverage; targets above it fall back to the largest count
+        vals = np.where(
+            np.asarray(target_covs) <= covs[-1],
+            np.interp(target_covs, covs, uniques),
+            uniques[-1],
+        )
+        for tc, val in zip(target_covs, vals):
+            row[f"local_words_for_{tc}"] = val
     else:
         for tc in target_covs: row[f"local_words_for_{tc}"] = 0
 
@@ -154,27 +237,304 @@ def scale_difficulty(raw_val: float) -> float:
     return max(0.0, min(10.0, scaled))
 
 
+def scale_difficulty_vec(raw: np.ndarray) -> np.ndarray:
+    """Vectorized version of `scale_difficulty` for a batch of raw outputs.
+
+    Args:
+        raw (np.ndarray): The raw outputs from the XGBoost model.
+
+    Returns:
+        np.ndarray: The scaled difficulty scores (0.0 to 10.0).
+    """
+    return np.clip((raw - SCALING_FLOOR) / (SCALING_CEILING - SCALING_FLOOR) * 10.0, 0.0, 10.0)
+
+
+def load_manifest() -> dict:
+    """Loads the enrichment manifest from a previous run.
+
+    The manifest maps episode paths (relative to STATS_DIR) to the mtime of
+    the file when it was last seen enriched.
+
+    Returns:
+        dict: The manifest, or an empty dict if missing or unreadable.
+    """
+    try:
+        return read_json(MANIFEST_PATH)
+    except Exception:
+        return {}
+
+
+def load_series(folder: str, force: bool = False, manifest: dict = None) -> tuple:
+    """Reads a series folder and builds feature rows for its pending episodes.
+
+    Args:
+        folder (str): The name of the folder in STATS_DIR.
+        force (bool): If True, includes episodes that already have ML scores.
+        manifest (dict, optional): Manifest from `load_manifest`. Episodes whose
+            mtime matches their entry are skipped without being opened.
+
+    Returns:
+        tuple: A list of (ep_path, ep_data, feature_row) tuples, the number
+        of episodes that failed to load, and a manifest dict of the
+        episodes found already enriched.
+    """
+    folder_path = os.path.join(STATS_DIR, folder)
+    manifest = manifest or {}
+
+    # One directory scan yields both the metadata check and the episode list
+    try:
+        with os.scandir(folder_path) as it:
+            json_files = {e.name: e for e in it if e.name.endswith(".json") and e.is_file()}
+    except OSError: return [], 0, {}
+
+    meta_entry = json_files.pop("metadata.json", None)
+    if meta_entry is None: return [], 0, {}
+
+    try:
+        metadata = read_json(meta_entry.path)
+    except: return [], 0, {}
+
+    items = []
+    errors = 0
+    enriched = {}
+    for ep_file in sorted(json_files):
+        ep_path = json_files[ep_file].path
+        key = f"{folder}/{ep_file}"
+
+        try:
+            mtime = json_files[ep_file].stat().st_mtime_ns
+
+            # Unchanged since it was last seen enriched: no need to open it
+            if not force and manifest.get(key) == mtime:
+                enriched[key] = mtime
+                continue
+
+            # Cheap probe before paying for a full parse
+            if not force and is_enriched(ep_path):
+                enriched[key] = mtime
+                continue
+
+            ep_data = read_json(ep_path)
+
+            # Skip if already processed
+            if not force and "raw_ml_difficulty" in ep_data and "ml_difficulty" in ep_data:
+                enriched[key] = mtime
+                continue
+
+            items.append((ep_path, ep_data, json_to_features(ep_data, metadata)))
+
+        except Exception:
+            errors += 1
+
+    return items, errors, enriched
+
+
+def prefetch_series(pool: ThreadPoolExecutor, folders: list, force: bool, depth: int, manifest: dict = None):
+    """Yields `load_series` results in folder order, reading ahead on a thread pool.
+
+    At most `depth` folders are in flight, which bounds memory while disk
+    reads overlap with inference on the main thread.
+
+    Args:
+        pool (ThreadPoolExecutor): Pool used for the reads.
+        folders (list): Folder names in STATS_DIR.
+        force (bool): Passed through to `load_series`.
+        depth (int): Maximum number of folders loaded ahead.
+        manifest (dict, optional): Passed through to `load_series`.
+
+    Yields:
+        tuple: The `load_series` result for each folder.
+    """
+    futures = deque()
+    for folder in folders:
+        futures.append(pool.submit(load_series, folder, force, manifest))
+        if len(futures) >= depth:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
 class InferencePipeline:
     """Wrapper for model inference.
 
     Handles loading artifacts, text encoding, scaling, and PCA transformation.
     """
 
-    def __init__(self, artifacts: dict):
+    def __init__(self, artifacts: dict, threads: int = None, fp16: bool = False):
         """Initializes the pipeline with loaded artifacts.
 
         Args:
             artifacts (dict): Dictionary containing 'model', 'scaler', 'pca', 
                 and 'feature_cols'.
+            threads (int, optional): Number of intra-op threads for torch.
+                Defaults to min(8, CPU count).
+            fp16 (bool, optional): Run the encoder in half precision on CUDA.
+                Ignored when no GPU is available, since FP16 is slower on CPU.
         """
         self.model = artifacts['model']
         self.scaler = artifacts['scaler']
         self.pca = artifacts['pca']
         self.feature_cols = artifacts['feature_cols']
-        
+        self.numeric_feature_names = list(self.feature_cols)
+
+        # Torch's default thread count is often 1 or every logical core;
+        # CPU encoding is fastest with a handful of intra-op threads
+        torch.set_num_threads(threads or min(8, os.cpu_count() or 1))
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Can only be set once per process
+
         print("Initializing SentenceTransformer...")
         self.encoder = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
 
+        if fp16 and torch.cuda.is_available():
+            print("Using FP16 encoder on CUDA.")
+            self.encoder = self.encoder.to("cuda").half()
+
+        # Description embeddings (1-D) keyed by description text; every
+        # episode of a series shares the same description
+        self._desc_cache = {}
+
+        # Model input buffers, reused across batches and grown on demand
+        self._buffers = {}
+
+        # Raw booster for inplace_predict, which skips DMatrix construction
+        self._booster = None
+        self._iteration_range = (0, 0)
+        if hasattr(self.model, "get_booster"):
+            self._booster = self.model.get_booster()
+            try:
+                # Match the sklearn wrapper, which stops at the best iteration
+                self._iteration_range = (0, self.model.best_iteration + 1)
+            except AttributeError:
+                pass
+
+    def encode_texts(self, texts: list) -> np.ndarray:
+        """Encodes texts in a single call, sorted by length to minimize padding.
+
+        Args:
+            texts (list): The strings to encode.
+
+        Returns:
+            np.ndarray: The embeddings, in the same order as `texts`.
+        """
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int32, count=len(texts))
+        order = np.argsort(lengths, kind="stable")
+        emb = self.encoder.encode(
+            [texts[i] for i in order],
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_tensor=True,
+            show_progress_bar=False,
+        )
+        # Leave the device (and FP16) only once, as float32
+        emb = emb.float().cpu().numpy()
+
+        inv = np.empty_like(order)
+        inv[order] = np.arange(len(order))
+        return emb[inv]
+
+    def build_numeric(self, rows: list) -> np.ndarray:
+        """Aligns and scales the numeric features of a batch of rows.
+
+        Args:
+            rows (list): Feature dictionaries generated by `json_to_features`.
+
+        Returns:
+            np.ndarray: The scaled numeric feature matrix (float32).
+        """
+        # Filled straight from the dicts; features missing from a row are 0.0
+        names = self.numeric_feature_names
+        X_num = np.empty((len(rows), len(names)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            X_num[i] = np.fromiter((row.get(c, 0.0) for c in names), dtype=np.float32, count=len(names))
+
+        return self.scaler.transform(X_num).astype(np.float32, copy=False)
+
+    def encode_text_features(self, rows: list) -> tuple:
+        """Encodes descriptions and lexical signatures for a batch of rows.
+
+        Signatures and any descriptions not cached yet go through a single
+        `encode_texts` call. Description embeddings are memoized by content,
+        so each series description is encoded once per run.
+
+        Args:
+            rows (list): Feature dictionaries generated by `json_to_features`.
+
+        Returns:
+            tuple: (description embeddings, signature embeddings).
+        """
+        n = len(rows)
+        subs = [str(r.get('lexical_signature', '')) for r in rows]
+        descs = [str(r.get('description', '')) for r in rows]
+
+        new_descs = [d for d in dict.fromkeys(descs) if d not in self._desc_cache]
+        emb = self.encode_texts(subs + new_descs)
+        for desc, vec in zip(new_descs, emb[n:]):
+            # Copied so the cache doesn't pin the whole batch's embedding matrix
+            self._desc_cache[desc] = vec.copy()
+
+        emb_desc = np.stack([self._desc_cache[d] for d in descs])
+        return emb_desc, emb[:n]
+
+    def attach_embeddings(self, X_num: np.ndarray, emb_desc: np.ndarray, emb_subs: np.ndarray) -> np.ndarray:
+        """Reduces the text embeddings with PCA and joins them to the numeric features.
+
+        Args:
+            X_num (np.ndarray): Scaled numeric features.
+            emb_desc (np.ndarray): Description embeddings.
+            emb_subs (np.ndarray): Lexical signature embeddings.
+
+        Returns:
+            np.ndarray: The final model input matrix (float32).
+        """
+        n, d_desc = emb_desc.shape
+        X_text = self._buffer("text", n, d_desc + emb_subs.shape[1])
+        X_text[:, :d_desc] = emb_desc
+        X_text[:, d_desc:] = emb_subs
+        X_text_pca = self.pca.transform(X_text)
+
+        n_num = X_num.shape[1]
+        X = self._buffer("input", n, n_num + X_text_pca.shape[1])
+        X[:, :n_num] = X_num
+        X[:, n_num:] = X_text_pca
+        return X
+
+    def _buffer(self, name: str, n: int, width: int) -> np.ndarray:
+        """Returns an (n, width) float32 view of a reusable buffer.
+
+        The view is only valid until the next call with the same name.
+        """
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape[0] < n or buf.shape[1] != width:
+            buf = self._buffers[name] = np.empty((n, width), dtype=np.float32)
+        return buf[:n]
+
+    def predict_batch(self, rows: list) -> np.ndarray:
+        """Predicts difficulty scores for a batch of rows.
+
+        Args:
+            rows (list): Feature dictionaries generated by `json_to_features`.
+                A pandas DataFrame of such rows is also accepted.
+
+        Returns:
+            np.ndarray: The raw difficulty predictions from the model.
+        """
+        if hasattr(rows, "to_dict"):
+            rows = rows.to_dict("records")  # DataFrame callers from the pandas-based pipeline
+
+        X_num = self.build_numeric(rows)
+        emb_desc, emb_subs = self.encode_text_features(rows)
+        X = np.ascontiguousarray(self.attach_embeddings(X_num, emb_desc, emb_subs))
+
+        if self._booster is not None:
+            try:
+                return self._booster.inplace_predict(X, iteration_range=self._iteration_range)
+            except Exception:
+                self._booster = None  # Unsupported booster, use the wrapper from now on
+
+        return self.model.predict(X)
+
     def predict(self, row_data: dict) -> float:
         """Predicts the difficulty score for a single row of data.
 
@@ -184,33 +544,21 @@ class InferencePipeline:
         Returns:
             float: The raw difficulty prediction from the model.
         """
-        # 1. Align features
-        df = pd.DataFrame([row_data])
-        for col in self.feature_cols:
-            if col not in df.columns: df[col] = 0.0
-        
-        # 2. Scale numeric features
-        X_num = self.scaler.transform(df[self.feature_cols].values)
-        
-        # 3. Encode and reduce text features
-        desc = str(row_data.get('description', ''))
-        subs = str(row_data.get('lexical_signature', ''))
-        
-        emb_desc = self.encoder.encode([desc], show_progress_bar=False)
-        emb_subs = self.encoder.encode([subs], show_progress_bar=False)
-        
-        X_text_pca = self.pca.transform(np.hstack((emb_desc, emb_subs)))
-        
-        # 4. Concatenate and predict
-        X_final = np.hstack((X_num, X_text_pca))
-        return self.model.predict(X_final)[0]
-
-
-def main():
-    """Main execution function to process all statistics files."""
+        return self.predict_batch([row_data])[0]
+
+
+def main(argv: list = None):
+    """Main execution function to process all statistics files.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+    """
     parser = argparse.ArgumentParser(description="Enrich stats with ML difficulty scores")
     parser.add_argument("--force", action="store_true", help="Overwrite existing ML scores")
-    args = parser.parse_args()
+    parser.add_argument("--threads", type=int, default=None, help="Torch CPU threads (default: min(8, CPU count))")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Episodes per inference batch")
+    parser.add_argument("--fp16", action="store_true", help="Run the encoder in FP16 on CUDA GPUs")
+    args = parser.parse_args(argv)
 
     print("Starting Anime Difficulty Enrichment...")
 
@@ -219,7 +567,7 @@ def main():
         model_path = download_model(HF_REPO_ID, HF_FILENAME)
         with open(model_path, "rb") as f:
             artifacts = pickle.load(f)
-        pipeline = InferencePipeline(artifacts)
+        pipeline = InferencePipeline(artifacts, threads=args.threads, fp16=args.fp16)
     except Exception as e:
         print(f"Error loading model: {e}")
         return
@@ -229,52 +577,92 @@ def main():
         return
 
     # Process files
-    folders = sorted(os.listdir(STATS_DIR))
+    with os.scandir(STATS_DIR) as it:
+        folders = sorted(e.name for e in it if e.is_dir())
     processed_cnt = 0
     error_cnt = 0
 
-    for folder in tqdm(folders, desc="Processing Series"):
-        folder_path = os.path.join(STATS_DIR, folder)
-        if not os.path.isdir(folder_path): continue
-
-        meta_path = os.path.join(folder_path, "metadata.json")
-        if not os.path.exists(meta_path): continue
+    # Pending episodes are buffered across series and flushed in large batches
+    pending = []  # (ep_path, ep_data)
+    rows = []
+    writes = []  # (ep_path, future) for background writes
+    in_flight = deque()  # Futures whose writes may not have finished yet
 
-        try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                metadata = json.load(f)
-        except: continue
+    # Rebuilt from this run's scan, so entries for deleted files drop out
+    manifest = load_manifest()
+    new_manifest = {}
 
-        ep_files = sorted([f for f in os.listdir(folder_path) if f.endswith(".json") and f != "metadata.json"])
+    def flush():
+        nonlocal error_cnt
 
-        for ep_file in ep_files:
-            ep_path = os.path.join(folder_path, ep_file)
+        if not pending: return
 
-            try:
-                with open(ep_path, "r", encoding="utf-8") as f:
-                    ep_data = json.load(f)
-
-                # Skip if already processed
-                if not args.force and "raw_ml_difficulty" in ep_data and "ml_difficulty" in ep_data:
-                    continue
-
-                # Predict
-                feats = json_to_features(ep_data, metadata)
-                raw_pred = pipeline.predict(feats)
-                
-                # Update JSON
-                ep_data["raw_ml_difficulty"] = round(float(raw_pred), 2)
-                ep_data["ml_difficulty"] = round(scale_difficulty(ep_data["raw_ml_difficulty"]), 1)
-
-                with open(ep_path, "w", encoding="utf-8") as f:
-                    json.dump(ep_data, f, ensure_ascii=False, indent=2)
-                
-                processed_cnt += 1
+        # Predict
+        try:
+            raw_preds = [round(float(p), 2) for p in pipeline.predict_batch(rows)]
+        except Exception as e:
+            # Retry one episode at a time so a bad episode only costs itself
+            tqdm.write(f"Batch of {len(pending)} episodes failed ({e}); retrying individually")
+            raw_preds = []
+            for (ep_path, _), row in zip(pending, rows):
+                try:
+                    raw_preds.append(round(float(pipeline.predict(row)), 2))
+                except Exception as ep_err:
+                    tqdm.write(f"  Skipping {os.path.relpath(ep_path, STATS_DIR)}: {ep_err}")
+                    error_cnt += 1
+                    raw_preds.append(None)
+
+        done = [(item, p) for item, p in zip(pending, raw_preds) if p is not None]
+        if done:
+            scaled = scale_difficulty_vec(np.array([p for _, p in done]))
+
+            for i, ((ep_path, ep_data), raw_pred) in enumerate(done):
+                # Update JSON; the write overlaps with the next batch's inference
+                ep_data["raw_ml_difficulty"] = raw_pred
+                ep_data["ml_difficulty"] = round(float(scaled[i]), 1)
+
+                fut = write_pool.submit(write_json, ep_path, ep_data)
+                writes.append((ep_path, fut))
+                in_flight.append(fut)
+
+        pending.clear()
+        rows.clear()
+
+        # Queued writes hold their episode data, so wait on the oldest ones
+        # rather than let the backlog grow when the disk falls behind
+        while len(in_flight) > WRITE_BACKLOG_BATCHES * args.batch_size:
+            in_flight.popleft().exception()  # Blocks; failures are counted at the end
+
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as io_pool, \
+            ThreadPoolExecutor(max_workers=WRITE_WORKERS) as write_pool:
+        series_iter = prefetch_series(io_pool, folders, args.force, depth=2 * IO_WORKERS, manifest=manifest)
+        for items, errors, enriched in tqdm(series_iter, total=len(folders), desc="Processing Series"):
+            error_cnt += errors
+            new_manifest.update(enriched)
+
+            for ep_path, ep_data, row in items:
+                pending.append((ep_path, ep_data))
+                rows.append(row)
+
+                if len(pending) >= args.batch_size:
+                    flush()
+
+        flush()
+
+    # Both pools have been joined, so every write has finished
+    for ep_path, fut in writes:
+        if fut.exception() is None:
+            processed_cnt += 1
+            new_manifest[os.path.relpath(ep_path, STATS_DIR).replace(os.sep, "/")] = os.stat(ep_path).st_mtime_ns
+        else:
+            error_cnt += 1
 
-            except Exception:
-                error_cnt += 1
+    try:
+        write_json(MANIFEST_PATH, new_manifest)
+    except OSError as e:
+        print(f"Could not save enrichment manifest: {e}")
 
     print(f"Done. Processed: {processed_cnt}, Errors: {error_cnt}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
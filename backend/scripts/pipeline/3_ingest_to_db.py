@@ -1,7 +1,9 @@
 import sys
 import os
-import json
 import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import orjson
 from sqlmodel import Session
 
 # Add project root to path (go up from scripts/pipeline/ to root)
@@ -10,31 +12,42 @@ sys.path.insert(0, PROJECT_ROOT)
 
 from app.core.database import engine
 from app.services.ingestion_service import (
-    ingest_episode_stats,
+    ingest_series_stats,
     update_series_aggregates,
 )
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 STATS_DIR = os.path.join(DATA_DIR, "analyzed_stats")
+IO_WORKERS = 8  # Threads reading episode JSON files
+SERIES_WORKERS = min(8, os.cpu_count() or 1)  # Processes ingesting series in parallel
 
 
-def ingest_series(folder_name: str):
-    """Ingests a single series folder containing analyzed JSON stats.
+def load_stats(json_path: str):
+    """Loads an episode stats file.
 
     Args:
-        folder_name (str): The name of the folder in STATS_DIR.
+        json_path (str): Path to the episode JSON file.
+
+    Returns:
+        Optional[dict]: The stats dictionary, or None if the file is corrupt.
     """
-    series_path = os.path.join(STATS_DIR, folder_name)
+    try:
+        with open(json_path, "rb") as f:
+            return orjson.loads(f.read())
+    except orjson.JSONDecodeError:
+        return None
 
-    # Load Metadata
-    meta_path = os.path.join(series_path, "metadata.json")
-    if not os.path.exists(meta_path):
-        print(f"Skipping {folder_name}: No metadata.json")
-        return
 
-    with open(meta_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+def resolve_series_title(folder_name: str, metadata: dict) -> str:
+    """Picks the series title from metadata, falling back to the folder name.
 
+    Args:
+        folder_name (str): The name of the folder in STATS_DIR.
+        metadata (dict): The series metadata.
+
+    Returns:
+        str: The Japanese series title.
+    """
     series_title = metadata.get("title_jp")
     if not series_title:
         # Fallback to folder name, stripping ID prefix if present (e.g. "6190_Title" -> "Title")
@@ -43,70 +56,179 @@ def ingest_series(folder_name: str):
             series_title = parts[1]
         else:
             series_title = folder_name
+    return series_title
+
 
+def ingest_series(folder_name: str):
+    """Ingests a single series folder containing analyzed JSON stats.
+
+    Args:
+        folder_name (str): The name of the folder in STATS_DIR.
+    """
+    series_path = os.path.join(STATS_DIR, folder_name)
+
+    # One directory scan covers both the metadata check and the episode list
+    with os.scandir(series_path) as it:
+        json_files = {e.name: e.path for e in it if e.name.endswith(".json") and e.is_file()}
+
+    # Load Metadata
+    meta_path = json_files.pop("metadata.json", None)
+    if meta_path is None:
+        print(f"Skipping {folder_name}: No metadata.json")
+        return
+
+    with open(meta_path, "rb") as f:
+        metadata = orjson.loads(f.read())
+
+    series_title = resolve_series_title(folder_name, metadata)
     print(f"\nIngesting Series: {series_title}")
 
     # Process Episodes
-    files = sorted(
-        [
-            f
-            for f in os.listdir(series_path)
-            if f.endswith(".json") and f != "metadata.json"
-        ]
-    )
+    episodes = []
+    for file in sorted(json_files):
+        # Filename is "01.json"
+        try:
+            ep_num = int(os.path.splitext(file)[0])
+        except ValueError:
+            continue
+        episodes.append((ep_num, json_files[file]))
+
+    # Episode files are read on a thread pool, then written in one bulk transaction
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        loaded = pool.map(load_stats, [path for _, path in episodes])
+
+        episode_stats = []
+        for (ep_num, _), stats in zip(episodes, loaded):
+            if stats is None:
+                print(f"  [Ep {ep_num}] Skipping corrupt JSON file.")
+                continue
+            episode_stats.append((ep_num, stats))
 
-    series_obj = None
+    if not episode_stats:
+        return
 
     with Session(engine) as session:
-        for file in files:
-            # Filename is "01.json"
-            try:
-                ep_num = int(os.path.splitext(file)[0])
-            except ValueError:
-                continue
+        print(f"  Saving {len(episode_stats)} episodes to DB...", end="")
+        series_obj = ingest_series_stats(session, episode_stats, series_title, metadata)
+        print(" Done.")
 
-            json_path = os.path.join(series_path, file)
+        # Update Aggregates (Once per series, after all episodes are inserted)
+        print("  Updating Aggregates...")
+        update_series_aggregates(session, series_obj)
+
+
+def _init_worker():
+    """Drops pooled connections inherited from the parent after a fork."""
+    engine.dispose(close=False)
+
+
+def series_key(folder_name: str) -> str:
+    """Resolves the series title a folder will be ingested under.
+
+    Args:
+        folder_name (str): The name of the folder in STATS_DIR.
+
+    Returns:
+        str: The series title, or the folder name if it has no metadata.json.
+    """
+    meta_path = os.path.join(STATS_DIR, folder_name, "metadata.json")
+    try:
+        with open(meta_path, "rb") as f:
+            metadata = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return folder_name  # ingest_series reports or skips it on its own
+    return resolve_series_title(folder_name, metadata)
+
+
+def ingest_folders(folders: list):
+    """Ingests folders one after another in the calling process.
+
+    Args:
+        folders (list): Folder names in STATS_DIR.
+    """
+    for folder in folders:
+        ingest_series(folder)
+
+
+def ingest_all(folders: list, workers: int = SERIES_WORKERS):
+    """Ingests many series, fanning out across processes where possible.
+
+    Series rows are found by title, and several folders can resolve to the
+    same title. Folders are therefore grouped by title and each group is
+    ingested sequentially by one worker, so no two processes ever write the
+    same series. SQLite serializes writers, and platforms without fork
+    cannot re-import this script by path, so both fall back to a plain loop.
+    Every group is attempted; any failures are raised once the pool drains.
+
+    Args:
+        folders (list): Folder names in STATS_DIR.
+        workers (int): Maximum number of worker processes.
+
+    Raises:
+        RuntimeError: If any series failed to ingest in the worker pool.
+    """
+    parallel = (
+        workers > 1
+        and len(folders) > 1
+        and engine.dialect.name != "sqlite"
+        and "fork" in multiprocessing.get_all_start_methods()
+    )
+    if not parallel:
+        ingest_folders(folders)
+        return
+
+    groups = {}
+    for folder in folders:
+        groups.setdefault(series_key(folder), []).append(folder)
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(groups)),
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_worker,
+    ) as pool:
+        failed = []
+        futures = [(title, pool.submit(ingest_folders, group)) for title, group in groups.items()]
+        for title, future in futures:
             try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    stats = json.load(f)
-            except json.JSONDecodeError:
-                print(f"  [Ep {ep_num}] Skipping corrupt JSON file.")
-                continue
+                future.result()
+            except Exception as e:
+                print(f"Failed to ingest {title}: {e}")
+                failed.append(title)
 
-            print(f"  [Ep {ep_num}] Saving to DB...", end="")
-            series_obj = ingest_episode_stats(
-                session, stats, series_title, ep_num, metadata
-            )
-            print(" Done.")
+    # Surface failures like the sequential loop does, so callers see a non-zero exit
+    if failed:
+        raise RuntimeError(f"Failed to ingest {len(failed)} series: {', '.join(failed)}")
 
-        # Update Aggregates (Once per series, after all episodes are inserted)
-        if series_obj:
-            print("  Updating Aggregates...")
-            update_series_aggregates(session, series_obj)
 
+def main(argv: list = None):
+    """Main entry point for ingesting stats.
 
-def main():
-    """Main entry point for ingesting stats."""
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
+    """
     parser = argparse.ArgumentParser(description="Ingest JSON stats into DB")
     parser.add_argument("--all", action="store_true", help="Ingest all folders")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SERIES_WORKERS,
+        help="Processes used by --all (SQLite always ingests sequentially)",
+    )
+    args = parser.parse_args(argv)
 
     if not os.path.exists(STATS_DIR):
         print(f"No analyzed stats found at: {STATS_DIR}")
         print("Please run step 1 (analyze_subs.py) first.")
         return
 
-    folders = sorted(os.listdir(STATS_DIR))
+    with os.scandir(STATS_DIR) as it:
+        valid_folders = sorted(e.name for e in it if e.is_dir())
 
     if args.all:
-        for folder in folders:
-            if os.path.isdir(os.path.join(STATS_DIR, folder)):
-                ingest_series(folder)
+        ingest_all(valid_folders, workers=args.workers)
     else:
         # Interactive
-        valid_folders = [
-            f for f in folders if os.path.isdir(os.path.join(STATS_DIR, f))
-        ]
+        valid_folders_lc = [f.lower() for f in valid_folders]
         target_folders = []
 
         while True:
@@ -120,7 +242,11 @@ def main():
             if not search:
                 matches = valid_folders
             else:
-                matches = [f for f in valid_folders if search in f.lower()]
+                matches = [
+                    valid_folders[i]
+                    for i, lc in enumerate(valid_folders_lc)
+                    if search in lc
+                ]
 
             if not matches:
                 print("No matches found.")
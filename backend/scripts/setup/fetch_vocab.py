@@ -1,11 +1,24 @@
 import requests
-import json
+import msgpack
 import os
+import sys
+import pickle
+import hashlib
+import argparse
 import tarfile
-import shutil
 import csv
-import io
-from typing import Dict, Tuple
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import ijson.backends.yajl2_c as ijson  # C backend, much faster
+except ImportError:
+    import ijson
 
 # JMDict Source (simplified JSON version)
 JMDICT_URL = "https://github.com/scriptin/jmdict-simplified/releases/download/3.6.1%2B20251208123023/jmdict-eng-3.6.1+20251208123023.json.tgz"
@@ -16,7 +29,108 @@ JLPT_URL_TEMPLATE = "https://raw.githubusercontent.com/stephenmk/yomitan-jlpt-vo
 # JPDB frequency source
 JPDB_FREQ_URL = "https://raw.githubusercontent.com/Kuuuube/yomitan-dictionaries/main/data/jpdb_v2.2_freq_list_2024-10-13.csv"
 
-OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "vocab.json")
+OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "vocab.msgpack")
+
+# Parsed JLPT/frequency maps are cached here between runs
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
+
+
+class IncompleteDataError(Exception):
+    """Raised by a builder whose result is usable but missing some sources."""
+
+    def __init__(self, message: str, data: Any):
+        super().__init__(message)
+        self.data = data
+
+
+def _source_fingerprint(urls: List[str]) -> Optional[str]:
+    """Fingerprints remote sources by their ETag (or Last-Modified) headers.
+
+    Args:
+        urls (List[str]): Source URLs.
+
+    Returns:
+        Optional[str]: A hash of the URLs and their validators, or None if any
+        source could not be checked.
+    """
+    h = hashlib.sha256()
+    for url in urls:
+        try:
+            resp = requests.head(url, allow_redirects=True, timeout=10)
+        except requests.RequestException:
+            return None
+        validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        if resp.status_code != 200 or not validator:
+            return None
+        h.update(f"{url}\n{validator}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def cached_build(name: str, urls: List[str], build: Callable[[], Any], refresh: bool = False) -> Any:
+    """Returns a pickled result from a previous run if its sources are unchanged.
+
+    Args:
+        name (str): Cache file name (without extension).
+        urls (List[str]): Source URLs the result is built from.
+        build (Callable[[], Any]): Builds the result when the cache is stale.
+            May raise IncompleteDataError to return a partial result that
+            should not be cached.
+        refresh (bool): If True, ignores any cached result.
+
+    Returns:
+        Any: The cached or freshly built result.
+    """
+    cache_path = os.path.join(CACHE_DIR, f"{name}.pkl")
+    fingerprint = _source_fingerprint(urls)
+
+    if not refresh and fingerprint and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["fingerprint"] == fingerprint:
+                print(f"Using cached {name} ({len(cached['data'])} entries).")
+                return cached["data"]
+        except Exception:
+            pass  # Corrupt or outdated cache; rebuild
+
+    try:
+        data = build()
+    except IncompleteDataError as e:
+        # Use what we have for this run, but fetch again next time
+        print(f"Not caching {name}: {e}")
+        return e.data
+
+    # Empty results usually mean a failed download; don't cache those
+    if fingerprint and data:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump({"fingerprint": fingerprint, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return data
+
+
+def _fetch_jlpt_words(level: int) -> List[str]:
+    """Streams the vocabulary CSV for a single JLPT level.
+
+    Args:
+        level (int): JLPT level (1-5).
+
+    Returns:
+        List[str]: Words in file order (kanji form, or kana if there is none).
+    """
+    words = []
+    with requests.get(JLPT_URL_TEMPLATE.format(level), stream=True) as resp:
+        resp.raise_for_status()
+        resp.encoding = "utf-8"
+        for row in csv.reader(resp.iter_lines(decode_unicode=True)):
+            if len(row) >= 1:
+                kanji = row[2].strip()
+                kana = row[1].strip()
+                if kanji:
+                    words.append(kanji)
+                elif kana:
+                    words.append(kana)
+    return words
 
 
 def get_jlpt_map() -> Dict[str, int]:
@@ -25,87 +139,126 @@ def get_jlpt_map() -> Dict[str, int]:
     Returns:
         Dict[str, int]: A dictionary mapping words (kanji or kana) to JLPT levels (1-5).
         Example: {'猫': 5, '食べる': 5}
+
+    Raises:
+        IncompleteDataError: If any level failed to download; carries the map
+            built from the levels that succeeded.
     """
     print("Building JLPT map...")
     jlpt_map = {}
-    import csv
-    import io
+    levels = [5, 4, 3, 2, 1]
+
+    # Download all levels concurrently; merge in the fixed order below so
+    # that a word listed at several levels keeps the hardest one
+    with ThreadPoolExecutor(max_workers=len(levels)) as pool:
+        futures = [pool.submit(_fetch_jlpt_words, level) for level in levels]
 
-    for level in [5, 4, 3, 2, 1]:
-        url = JLPT_URL_TEMPLATE.format(level)
+    failed = []
+    for level, future in zip(levels, futures):
         try:
-            resp = requests.get(url)
-            content = resp.content.decode("utf-8")
-            reader = csv.reader(io.StringIO(content))
-            for row in reader:
-                if len(row) >= 1:
-                    kanji = row[2].strip()
-                    kana = row[1].strip()
-                    if kanji:
-                        jlpt_map[kanji] = level
-                    elif kana:
-                        jlpt_map[kana] = level
+            for word in future.result():
+                jlpt_map[word] = level
 
         except Exception as e:
             print(f"Error fetching N{level}: {e}")
+            failed.append(f"N{level}")
 
     print(f"Loaded {len(jlpt_map)} JLPT words for tagging.")
+    if failed:
+        raise IncompleteDataError(f"missing {', '.join(failed)}", jlpt_map)
     return jlpt_map
 
 
-def get_frequency_map() -> Dict[Tuple[str, str], Dict[str, int]]:
+def _parse_rank_column(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Converts a string column of ranks to int64, with nulls for non-numeric cells.
+
+    Args:
+        col (pa.ChunkedArray): Raw CSV cells.
+
+    Returns:
+        pa.ChunkedArray: Parsed ranks.
+    """
+    col = pc.utf8_trim_whitespace(col)
+    numeric = pc.match_substring_regex(col, r"^[0-9]+$")
+    return pc.cast(pc.if_else(numeric, col, pa.scalar(None, pa.string())), pa.int64())
+
+
+def get_frequency_map() -> Dict[Tuple[str, str], Tuple[Optional[int], Optional[int], int]]:
     """Downloads Frequency CSV and returns a mapping of (word, reading) to frequency data.
 
     Returns:
-        Dict[Tuple[str, str], Dict[str, int]]: A dictionary where keys are (term, reading)
-        and values are dicts containing 'main', 'kana', and 'effective' frequency ranks.
+        Dict[Tuple[str, str], Tuple[Optional[int], Optional[int], int]]: A dictionary
+        where keys are (term, reading) and values are (main, kana, effective)
+        frequency ranks.
     """
     print("Building Frequency map...")
     freq_map = {}
 
     try:
-        resp = requests.get(JPDB_FREQ_URL)
-        if resp.status_code != 200:
-            print("Warning: Could not download frequency data.")
-            return {}
-
-        content = resp.content.decode("utf-8")
-
-        # Tab-separted file so use delimiter '\t'
-        reader = csv.reader(io.StringIO(content), delimiter="\t")
-
-        header = next(reader, None)  # Skip header
-
-        print(f"Frequency Data Head: {content[:100]}...")
+        with requests.get(JPDB_FREQ_URL, stream=True) as resp:
+            if resp.status_code != 200:
+                print("Warning: Could not download frequency data.")
+                return {}
+
+            # Arrow's C++ reader tokenizes the stream directly; every column is
+            # read as text and the header row is skipped. Arrow fixes the column
+            # count from the first data row, so rows with a different number
+            # of fields are set aside here and parsed below
+            resp.raw.decode_content = True
+            odd_rows = []
+
+            def set_aside(row) -> str:
+                odd_rows.append(row.text)
+                return "skip"
+
+            table = pacsv.read_csv(
+                resp.raw,
+                read_options=pacsv.ReadOptions(skip_rows=1, autogenerate_column_names=True),
+                # Tab-separted file so use delimiter '\t'
+                parse_options=pacsv.ParseOptions(delimiter="\t", invalid_row_handler=set_aside),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={f"f{i}": pa.string() for i in range(4)},
+                    strings_can_be_null=False,
+                ),
+            )
 
         # CSV format: term, reading, frequency, kana_frequency
-        for row in reader:
-            if len(row) < 3:
-                continue
-
-            term = row[0].strip()
-            reading = row[1].strip()
-            freq_str = row[2].strip()
-            main_freq = int(freq_str) if freq_str and freq_str.isdigit() else None
-            kana_freq_str = row[3].strip() if len(row) > 3 else ""
-            kana_freq = (
-                int(kana_freq_str)
-                if kana_freq_str and kana_freq_str.isdigit()
-                else None
-            )
+        # Rows need at least 3 fields; a missing kana_frequency reads as null
+        extra = [row for row in csv.reader(odd_rows, delimiter="\t") if len(row) >= 3]
+        base_rows = len(table) if table.num_columns >= 3 else 0
 
-            # For kana-only words, prioritize kana_frequency if available
-            if term == reading and kana_freq is not None:
-                effective_freq = kana_freq
+        def column(i: int) -> pa.ChunkedArray:
+            if base_rows and i < table.num_columns:
+                chunks = table.column(i).chunks
             else:
-                effective_freq = main_freq
+                chunks = [pa.nulls(base_rows, pa.string())]
+            tail = pa.array([row[i] if len(row) > i else None for row in extra], pa.string())
+            return pa.chunked_array([*chunks, tail], type=pa.string())
+
+        if base_rows + len(extra) == 0:
+            print("Warning: Unexpected frequency data format.")
+            return {}
 
-            if effective_freq is not None:
-                freq_map[(term, reading)] = {
-                    "main": main_freq,
-                    "kana": kana_freq,
-                    "effective": effective_freq,
-                }
+        terms = pc.utf8_trim_whitespace(column(0))
+        readings = pc.utf8_trim_whitespace(column(1))
+        main = _parse_rank_column(column(2))
+        kana = _parse_rank_column(column(3))
+
+        # For kana-only words, prioritize kana_frequency if available
+        use_kana = pc.and_(pc.equal(terms, readings), pc.is_valid(kana))
+        effective = pc.if_else(use_kana, kana, main)
+
+        keep = pc.is_valid(effective)
+        intern = sys.intern
+        for term, reading, main_freq, kana_freq, effective_freq in zip(
+            pc.filter(terms, keep).to_pylist(),
+            pc.filter(readings, keep).to_pylist(),
+            pc.filter(main, keep).to_pylist(),
+            pc.filter(kana, keep).to_pylist(),
+            pc.filter(effective, keep).to_pylist(),
+        ):
+            # Interned so keys shared with the JMDict pass reuse one object
+            freq_map[(intern(term), intern(reading))] = (main_freq, kana_freq, effective_freq)
 
     except Exception as e:
         print(f"Error processing frequency: {e}")
@@ -114,123 +267,187 @@ def get_frequency_map() -> Dict[Tuple[str, str], Dict[str, int]]:
     return freq_map
 
 
-def fetch_and_process():
-    """Orchestrates the download and processing of vocabulary data.
+class _PrefetchReader:
+    """File-like wrapper that reads a stream ahead on a background thread.
 
-    Downloads JMDict, JLPT lists, and frequency lists, merges them,
-    and saves the result to 'vocab.json'.
+    Lets the network download (which releases the GIL) overlap with
+    decompressing and parsing JMDict on the main thread.
     """
-    # Build the JLPT Lookup Table
-    jlpt_levels = get_jlpt_map()
 
-    freq_map = get_frequency_map()
+    CHUNK_SIZE = 1 << 20
+    MAX_CHUNKS = 16
 
-    # Download JMDict
-    print("Downloading JMDict")
-    local_tgz = "jmdict.json.tgz"
+    def __init__(self, raw):
+        self._chunks = queue.Queue(maxsize=self.MAX_CHUNKS)
+        self._chunk = b""
+        self._pos = 0
+        self._eof = False
+        self._error = None
+        self._thread = threading.Thread(target=self._fill, args=(raw,), daemon=True)
+        self._thread.start()
 
-    with requests.get(JMDICT_URL, stream=True) as r:
-        with open(local_tgz, "wb") as f:
-            shutil.copyfileobj(r.raw, f)
-
-    # Process JMDict
-    print("Processing dictionary entries...")
-    final_vocab = []
-    processed_word_reading_pairs = set()
-
-    with tarfile.open(local_tgz, "r:gz") as tar:
-        # Find the JSON file inside the archive
-        json_member = None
-        for member in tar.getmembers():
-            if member.name.endswith(".json"):
-                json_member = member
+    def _fill(self, raw):
+        try:
+            while True:
+                chunk = raw.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._chunks.put(chunk)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._chunks.put(b"")
+
+    def _next_chunk(self) -> bool:
+        chunk = self._chunks.get()
+        if not chunk:
+            self._eof = True
+            if self._error is not None:
+                raise self._error
+            return False
+        self._chunk, self._pos = chunk, 0
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        while size != 0:
+            if self._pos >= len(self._chunk) and (self._eof or not self._next_chunk()):
                 break
+            end = len(self._chunk) if size < 0 else self._pos + size
+            part = self._chunk[self._pos:end]
+            self._pos += len(part)
+            if size > 0:
+                size -= len(part)
+            parts.append(part)
+        return b"".join(parts)
 
-        if not json_member:
-            raise Exception("No JSON file found inside the TGZ archive.")
 
-        # Extract the file object
-        f = tar.extractfile(json_member)
+def fetch_and_process(refresh: bool = False):
+    """Orchestrates the download and processing of vocabulary data.
 
-        # Load the JSON
-        jmdict_data = json.load(f)
-        # Structure is: {"words": [ ...entries... ]}
+    Downloads JMDict, JLPT lists, and frequency lists, merges them,
+    and streams the result to 'vocab.msgpack' as a sequence of MessagePack maps.
 
-        for entry in jmdict_data["words"]:
-            # Get the main word (Kanji)
-            # Usually the first "kanji" entry, or if none, the first "kana"
-            if entry["kanji"]:
-                word = entry["kanji"][0]["text"]
-            else:
-                word = entry["kana"][0]["text"]
-
-            # Get the reading (Kana)
-            reading = entry["kana"][0]["text"] if entry["kana"] else ""
-
-            # Get Definitions (Gloss)
-            # Flatten the list of senses into a simple list of strings
-            meanings = []
-            for sense in entry["sense"]:
-                for gloss in sense["gloss"]:
-                    meanings.append(gloss["text"])
-
-            # Limit to top 5 meanings to save space
-            meanings = meanings[:5]
-
-            # Get JLPT Level if it has one
-            level = jlpt_levels.get(word, None)
-
-            # Track this combination
-            processed_word_reading_pairs.add((word, reading))
-
-            # Get frequency rank if exists
-            freq_data = freq_map.get((word, reading), {})
-            rank = freq_data.get("effective") or freq_data.get("main")
-            kana_rank = freq_data.get("kana")
-
-            final_vocab.append(
-                {
-                    "word": word,
-                    "reading": reading,
-                    "meanings": meanings,
-                    "level": level,
-                    "frequency_rank": rank,
-                    "kana_frequency_rank": kana_rank,
-                }
-            )
+    Args:
+        refresh (bool): If True, rebuilds the JLPT and frequency maps even
+            when cached copies are still current.
+    """
+    # Build the JLPT Lookup Table
+    jlpt_urls = [JLPT_URL_TEMPLATE.format(level) for level in [5, 4, 3, 2, 1]]
+    jlpt_levels = cached_build("jlpt_map", jlpt_urls, get_jlpt_map, refresh)
 
-    # Add entries that are in the frequency list but not in JMDict
-    print("Adding frequency-only entries...")
+    freq_map = cached_build("freq_map", [JPDB_FREQ_URL], get_frequency_map, refresh)
+
+    # Download and process JMDict; entries are written out as they are built
+    print("Downloading and processing JMDict entries...")
+    entry_count = 0
     freq_only_added = 0
-    for (word, reading), freq_data in freq_map.items():
-        if (word, reading) not in processed_word_reading_pairs:
-            level = jlpt_levels.get(word, None)
-            rank = freq_data.get("main")
-            kana_rank = freq_data.get("kana")
-
-            final_vocab.append(
-                {
-                    "word": word,
-                    "reading": reading,
-                    "meanings": [],  # No meaning from JMDict
-                    "level": level,
-                    "frequency_rank": rank,
-                    "kana_frequency_rank": kana_rank,
-                }
-            )
-            freq_only_added += 1
+    # Frequency-list pairs already covered by JMDict; only pairs present in
+    # freq_map matter for the frequency-only pass below
+    matched_freq_keys = set()
+
+    with open(OUTPUT_FILE, "wb") as out:
+        packer = msgpack.Packer(use_bin_type=True)
+
+        def write_entry(entry: dict):
+            # Entries are concatenated MessagePack maps; readers use msgpack.Unpacker
+            out.write(packer.pack(entry))
+
+        # Read the archive straight off the response; "r|gz" never seeks,
+        # so nothing is written to disk
+        with requests.get(JMDICT_URL, stream=True) as r, tarfile.open(
+            fileobj=_PrefetchReader(r.raw), mode="r|gz"
+        ) as tar:
+            # Find the JSON file inside the archive
+            f = None
+            for member in tar:
+                if member.name.endswith(".json"):
+                    f = tar.extractfile(member)
+                    break
+
+            if f is None:
+                raise Exception("No JSON file found inside the TGZ archive.")
+
+            # Bind hot lookups to locals for the per-entry loop
+            jlpt_get = jlpt_levels.get
+            freq_get = freq_map.get
+            intern = sys.intern
+
+            # Stream entries one at a time instead of loading the whole JSON
+            # Structure is: {"words": [ ...entries... ]}
+            for entry in ijson.items(f, "words.item"):
+                # Get the main word (Kanji)
+                # Usually the first "kanji" entry, or if none, the first "kana"
+                if entry["kanji"]:
+                    word = entry["kanji"][0]["text"]
+                else:
+                    word = entry["kana"][0]["text"]
+
+                # Get the reading (Kana)
+                reading = entry["kana"][0]["text"] if entry["kana"] else ""
+
+                # Homographs share readings heavily; keep one copy of each string
+                word = intern(word)
+                reading = intern(reading)
+
+                # Get Definitions (Gloss)
+                # Flatten the list of senses into a simple list of strings,
+                # limited to the top 5 meanings to save space
+                meanings = [g["text"] for sense in entry["sense"] for g in sense["gloss"]][:5]
+
+                # Get JLPT Level if it has one
+                level = jlpt_get(word)
+
+                # Get frequency rank if exists: (main, kana, effective)
+                key = (word, reading)
+                freq_data = freq_get(key)
+                if freq_data:
+                    matched_freq_keys.add(key)
+                    rank = freq_data[2] or freq_data[0]
+                    kana_rank = freq_data[1]
+                else:
+                    rank = kana_rank = None
+
+                write_entry(
+                    {
+                        "word": word,
+                        "reading": reading,
+                        "meanings": meanings,
+                        "level": level,
+                        "frequency_rank": rank,
+                        "kana_frequency_rank": kana_rank,
+                    }
+                )
+                entry_count += 1
+
+        # Add entries that are in the frequency list but not in JMDict
+        print("Adding frequency-only entries...")
+        # Probe with the existing key tuples rather than rebuilding one per entry
+        for key, (rank, kana_rank, _) in freq_map.items():
+            if key not in matched_freq_keys:
+                word, reading = key
+                level = jlpt_levels.get(word, None)
+
+                write_entry(
+                    {
+                        "word": word,
+                        "reading": reading,
+                        "meanings": [],  # No meaning from JMDict
+                        "level": level,
+                        "frequency_rank": rank,
+                        "kana_frequency_rank": kana_rank,
+                    }
+                )
+                freq_only_added += 1
 
     print(f"Added {freq_only_added} entries from frequency data not present in JMDict.")
-
-    # Save
-    print(f"Saving {len(final_vocab)} entries to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(final_vocab, f, ensure_ascii=False)
-
-    # Cleanup
-    os.remove(local_tgz)
+    print(f"Saved {entry_count + freq_only_added} entries to {OUTPUT_FILE}")
     print("Done")
 
 
 if __name__ == "__main__":
-    fetch_and_process()
+    parser = argparse.ArgumentParser(description="Build vocab.msgpack from JMDict, JLPT and JPDB data")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached JLPT/frequency maps")
+    args = parser.parse_args()
+
+    fetch_and_process(refresh=args.refresh)
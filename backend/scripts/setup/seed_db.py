@@ -1,6 +1,8 @@
-import json
+import msgpack
+import orjson
 import os
 import sys
+from itertools import islice
 
 # Add parent directory to path to allow importing from backend modules
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -10,27 +12,108 @@ from sqlmodel import Session, select
 from app.core.database import engine, create_db_and_tables
 from app.models.models import Vocab
 
-DATA_FILE = os.path.join(PROJECT_ROOT, "data", "vocab.json")
+DATA_FILE = os.path.join(PROJECT_ROOT, "data", "vocab.msgpack")
+
+COLUMNS = ("word", "reading", "meanings", "level", "frequency_rank", "kana_frequency_rank")
+BATCH_SIZE = 5000  # Rows per bulk insert on non-PostgreSQL databases
+
+
+def _copy_field(value) -> str:
+    """Formats a value for PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, list):
+        value = orjson.dumps(value).decode("utf-8")
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _CopyStream:
+    """File-like adapter feeding COPY rows from an entry iterator on demand."""
+
+    def __init__(self, entries):
+        self._entries = entries
+        self._buf = b""
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buf) < size:
+            entry = next(self._entries, None)
+            if entry is None:
+                break
+            line = "\t".join(_copy_field(entry.get(c)) for c in COLUMNS) + "\n"
+            self._buf += line.encode("utf-8")
+            self.count += 1
+
+        if size < 0:
+            size = len(self._buf)
+        chunk, self._buf = self._buf[:size], self._buf[size:]
+        return chunk
+
+
+def copy_entries(entries) -> int:
+    """Bulk-loads vocab entries with PostgreSQL COPY FROM STDIN.
+
+    Args:
+        entries: Iterator of vocab dictionaries.
+
+    Returns:
+        int: Number of rows loaded.
+    """
+    stream = _CopyStream(entries)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {Vocab.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN",
+                stream,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+    return stream.count
+
+
+def insert_entries(session: Session, entries) -> int:
+    """Bulk-inserts vocab entries in batches (fallback for non-PostgreSQL DBs).
+
+    Args:
+        session (Session): Database session.
+        entries: Iterator of vocab dictionaries.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    count = 0
+    while True:
+        batch = [{c: e.get(c) for c in COLUMNS} for e in islice(entries, BATCH_SIZE)]
+        if not batch:
+            break
+        session.bulk_insert_mappings(Vocab, batch)
+        session.commit()
+        count += len(batch)
+        print(f"Processed {count}...")
+    return count
 
 
 def seed_data():
-    """Seeds the database with vocabulary data from a JSON file.
+    """Seeds the database with vocabulary data from a MessagePack file.
 
-    Reads 'vocab.json', checks if the database is empty, and inserts
-    vocabulary items in batches if the table is empty.
+    Streams 'vocab.msgpack' entry by entry and, if the vocab table is empty,
+    bulk-loads it (COPY on PostgreSQL, batched inserts elsewhere).
     """
     print("Creating tables...")
     create_db_and_tables()
 
-    print("Reading JSON data...")
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(DATA_FILE):
         print(f"Error: Data file not found at {DATA_FILE}")
         return
 
-    print("Inserting data into PostgreSQL...")
     with Session(engine) as session:
         # Check if DB is already empty to avoid duplicates
         existing = session.exec(select(Vocab)).first()
@@ -38,32 +121,14 @@ def seed_data():
             print("Database already has data. Skipping seed.")
             return
 
-        count = 0
-        batch_size = 5000
-        batch = []
-
-        for i, entry in enumerate(json_data):
-            vocab = Vocab(
-                word=entry["word"],
-                reading=entry["reading"],
-                meanings=entry["meanings"],  # List of strings
-                level=entry["level"],  # Might be None
-                frequency_rank=entry["frequency_rank"],  # Might be None
-                kana_frequency_rank=entry["kana_frequency_rank"],  # Might be None
-            )
-            batch.append(vocab)
-            count += 1
-
-            if len(batch) >= batch_size:
-                session.add_all(batch)
-                session.commit()
-                batch = []
-                print(f"Processed {i}...")
-
-        # Commit remaining
-        if batch:
-            session.add_all(batch)
-            session.commit()
+        print("Streaming vocab data into the database...")
+        with open(DATA_FILE, "rb") as f:
+            # Sequence of MessagePack maps, decoded incrementally
+            entries = iter(msgpack.Unpacker(f, raw=False))
+            if engine.dialect.name == "postgresql":
+                count = copy_entries(entries)
+            else:
+                count = insert_entries(session, entries)
 
         print(f"Successfully inserted {count} entries into the database.")
 
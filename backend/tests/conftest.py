@@ -1,6 +1,9 @@
+import orjson
 import pytest
-from typing import Generator
-from fastapi.testclient import TestClient
+from typing import AsyncGenerator, Callable, Dict, Generator, Optional
+from fastapi import HTTPException, Request
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 import sys
@@ -14,9 +17,35 @@ os.environ["JWT_SECRET_KEY"] = "test_secret_key_for_pytest"
 
 from app.main import app
 from app.core.database import get_session
-from app.models.models import Vocab, AnimeSeries, AnimeEpisode
+from app.core.security import get_current_user, get_current_user_optional, pwd_context
+from app.models.models import Vocab, AnimeSeries, AnimeEpisode, User
 
-# Create in-memory SQLite database for testing
+def pytest_addoption(parser):
+    """Adds --runslow to opt into tests marked slow."""
+    parser.addoption("--runslow", action="store_true", default=False, help="run tests marked slow")
+
+
+def pytest_configure(config):
+    """Registers the slow marker."""
+    config.addinivalue_line("markers", "slow: calls a real external service; needs --runslow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skips tests marked slow unless --runslow is given."""
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="need --runslow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+# Production Argon2 parameters cost ~0.2s per hash; register/login tests only
+# need a valid round-trip, so use the cheapest settings argon2 allows
+pwd_context.update(argon2__time_cost=1, argon2__memory_cost=8, argon2__parallelism=1)
+
+# Create in-memory SQLite database for testing; under pytest-xdist every
+# worker process gets its own, so workers never share state
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
 engine = create_engine(
@@ -24,34 +53,90 @@ engine = create_engine(
 )
 
 
+# pysqlite's own transaction handling breaks SAVEPOINTs; let SQLAlchemy
+# emit BEGIN itself so per-test rollback works (SQLAlchemy's SQLite recipe)
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def create_schema() -> Generator[None, None, None]:
+    """Creates the test schema once for the whole test session."""
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
 # Define a fixture to override database dependency
 @pytest.fixture(name="session")
 def session_fixture() -> Generator[Session, None, None]:
-    """Creates a fresh in-memory database session for each test.
+    """Creates a database session isolated in a transaction for each test.
+
+    Commits made by the code under test only release savepoints; the outer
+    transaction is rolled back afterwards, so every test starts empty.
 
     Yields:
         Session: The SQLModel session connected to the test database.
     """
-    # Create the tables in the test DB
-    SQLModel.metadata.create_all(engine)
+    connection = engine.connect()
+    transaction = connection.begin()
 
-    with Session(engine) as session:
+    with Session(bind=connection, join_transaction_mode="create_savepoint") as session:
         yield session
 
-    # Tear down (drop tables) after test is done
-    SQLModel.metadata.drop_all(engine)
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def orjson_responses() -> Generator[None, None, None]:
+    """Decodes response bodies with orjson instead of the stdlib json module."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Response, "json", lambda self, **kwargs: orjson.loads(self.content))
+        yield
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    """Runs async tests on asyncio only (anyio's pytest plugin).
+
+    Session-scoped so the session-scoped async client can share its runner.
+    """
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def app_client() -> AsyncGenerator[AsyncClient, None]:
+    """Creates one in-process async client for the whole test session.
+
+    Requests go straight to the ASGI app through httpx's ASGITransport, without
+    the portal thread TestClient runs every call through.
+
+    Yields:
+        AsyncClient: The async HTTP client bound to the app.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
 
 
 # Define test client fixture
 @pytest.fixture(name="client")
-def client_fixture(session: Session) -> Generator[TestClient, None, None]:
-    """Creates a TestClient with the database dependency overridden.
+def client_fixture(session: Session, app_client: AsyncClient) -> Generator[AsyncClient, None, None]:
+    """Points the shared client at this test's database session.
 
     Args:
         session (Session): The test database session.
+        app_client (AsyncClient): The session-wide async client.
 
     Yields:
-        TestClient: The FastAPI test client.
+        AsyncClient: The async HTTP client bound to the app.
     """
 
     # Override the get_session dependency so the app uses SQLite test database
@@ -60,11 +145,11 @@ def client_fixture(session: Session) -> Generator[TestClient, None, None]:
 
     app.dependency_overrides[get_session] = get_session_override
 
-    client = TestClient(app)
-    yield client
+    yield app_client
 
-    # Clean up overrides
+    # Clean up overrides; drop cookies so state never leaks into the next test
     app.dependency_overrides.clear()
+    app_client.cookies.clear()
 
 
 @pytest.fixture(name="seeded_session")
@@ -144,3 +229,50 @@ def seeded_session_fixture(session: Session) -> Session:
 
     session.commit()
     return session
+
+
+@pytest.fixture(name="auth_headers")
+def auth_headers_fixture(session: Session) -> Callable[[str], Dict[str, str]]:
+    """Creates users directly in the database and returns their auth headers.
+
+    Skips the /auth/register and /auth/token round-trips (and their password
+    hashing) for tests that only need an authenticated user. The current-user
+    dependencies are overridden to resolve the returned header straight to its
+    User, so requests skip JWT verification and the per-request user lookup.
+    Asking for the same username again within a test returns the cached headers.
+
+    Args:
+        session (Session): The test database session.
+
+    Returns:
+        Callable[[str], Dict[str, str]]: Maps a username to Bearer headers.
+    """
+    users: Dict[str, User] = {}
+    cache: Dict[str, Dict[str, str]] = {}
+
+    def current_user_optional(request: Request) -> Optional[User]:
+        return users.get(request.headers.get("Authorization"))
+
+    def current_user(request: Request) -> User:
+        user = current_user_optional(request)
+        if user is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        return user
+
+    def make_headers(username: str = "test_user") -> Dict[str, str]:
+        if username not in cache:
+            user = User(username=username, hashed_password="unused")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+
+            header = f"Bearer test-token-{username}"
+            users[header] = user
+            cache[username] = {"Authorization": header}
+
+            # Cleared by the client fixture's teardown
+            app.dependency_overrides[get_current_user] = current_user
+            app.dependency_overrides[get_current_user_optional] = current_user_optional
+        return cache[username]
+
+    return make_headers
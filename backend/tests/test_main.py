@@ -1,23 +1,80 @@
-from fastapi.testclient import TestClient
+import pytest
+from httpx import AsyncClient
 from sqlmodel import Session
+from app.main import analyzer_service
 from app.models.models import Vocab
-from unittest.mock import patch, MagicMock
+from typing import Any, Dict
+from types import SimpleNamespace
+
+# Every test here drives the app through the async client
+pytestmark = pytest.mark.anyio
+
+
+def _token(surface: str, base: str, normalized: str, pos: str) -> dict:
+    """Builds a token shaped like Analyzer.get_tokens output."""
+    return {"surface": surface, "base": base, "normalized": normalized, "pos": tuple(pos.split(","))}
+
+
+# Sudachi's output for the texts the wiring tests analyze; test_analyze_text
+# still goes through the real tokenizer
+_CANNED_TOKENS = {
+    "猫は食べている": [
+        _token("猫", "猫", "猫", "名詞,普通名詞,一般,*,*,*"),
+        _token("は", "は", "は", "助詞,係助詞,*,*,*,*"),
+        _token("食べ", "食べる", "食べる", "動詞,一般,*,*,下一段-バ行,連用形-一般"),
+        _token("て", "て", "て", "助詞,接続助詞,*,*,*,*"),
+        _token("いる", "いる", "居る", "動詞,非自立可能,*,*,上一段-ア行,終止形-一般"),
+    ],
+    "猫が好きです。": [
+        _token("猫", "猫", "猫", "名詞,普通名詞,一般,*,*,*"),
+        _token("が", "が", "が", "助詞,格助詞,*,*,*,*"),
+        _token("好き", "好き", "好き", "形状詞,一般,*,*,*,*"),
+        _token("です", "です", "です", "助動詞,*,*,*,助動詞-デス,終止形-一般"),
+        _token("。", "。", "。", "補助記号,句点,*,*,*,*"),
+    ],
+    "さて": [
+        _token("さて", "さて", "扠", "接続詞,*,*,*,*,*"),
+    ],
+    "新しいボキャブラリー": [
+        _token("新しい", "新しい", "新しい", "形容詞,一般,*,*,形容詞,連体形-一般"),
+        _token("ボキャブラリー", "ボキャブラリー", "ボキャブラリー", "名詞,普通名詞,一般,*,*,*"),
+    ],
+}
+
+
+@pytest.fixture
+def fast_analyze(monkeypatch) -> None:
+    """Serves canned tokens for known texts so /analyze skips Sudachi.
+
+    For tests that exercise what happens after tokenization (enrichment,
+    stats, history); unknown texts still go through the real tokenizer.
+    """
+    real_get_tokens = analyzer_service.get_tokens
+
+    def get_tokens(text: str):
+        tokens = _CANNED_TOKENS.get(text)
+        if tokens is None:
+            return real_get_tokens(text)
+        # Enrichment adds keys to each token, so hand out fresh dicts
+        return [dict(t) for t in tokens]
+
+    monkeypatch.setattr(analyzer_service, "get_tokens", get_tokens)
 
 
-def test_read_root(client: TestClient):
+async def test_read_root(client: AsyncClient):
     """Test that the API is alive."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "API is ready", "docs": "/docs"}
 
 
-def test_analyze_text(client: TestClient, seeded_session: Session):
+async def test_analyze_text(client: AsyncClient, seeded_session: Session):
     """Test the NLP Engine's basic functionality.
 
     Uses 'seeded_session' to ensure '猫' exists in the DB and is correctly enriched.
     """
     payload = {"text": "猫は食べている"}
-    response = client.post("/analyze", json=payload)
+    response = await client.post("/analyze", json=payload)
 
     assert response.status_code == 200
     data = response.json()
@@ -34,19 +91,19 @@ def test_analyze_text(client: TestClient, seeded_session: Session):
     assert neko_token["reading"] == "ねこ"
 
 
-def test_full_user_flow(client: TestClient, seeded_session: Session):
+async def test_full_user_flow(client: AsyncClient, seeded_session: Session):
     """Tests the complete user lifecycle for vocabulary management.
 
     Flow: Register -> Login -> Save Word -> View Word -> Delete Word.
     """
     # Register
     reg_payload = {"username": "test_user", "password": "password123"}
-    response = client.post("/auth/register", json=reg_payload)
+    response = await client.post("/auth/register", json=reg_payload)
     assert response.status_code == 201
 
     # Login
     login_payload = {"username": "test_user", "password": "password123"}
-    response = client.post("/auth/token", data=login_payload)
+    response = await client.post("/auth/token", data=login_payload)
     assert response.status_code == 200
     token = response.json()["access_token"]
 
@@ -55,12 +112,12 @@ def test_full_user_flow(client: TestClient, seeded_session: Session):
 
     # Save word
     save_payload = {"word": "猫"}
-    response = client.post("/words/save", json=save_payload, headers=headers)
+    response = await client.post("/words/save", json=save_payload, headers=headers)
     assert response.status_code == 200
     assert "Saved" in response.json()["message"]
 
     # Verify it is in the list
-    response = client.get("/words/me", headers=headers)
+    response = await client.get("/words/me", headers=headers)
     assert response.status_code == 200
     saved_list = response.json()["saved_words"]
     assert len(saved_list) == 1
@@ -68,22 +125,22 @@ def test_full_user_flow(client: TestClient, seeded_session: Session):
 
     # Delete word
     del_payload = {"word": "猫"}
-    response = client.request(
+    response = await client.request(
         "DELETE", "/words/remove", json=del_payload, headers=headers
     )
     assert response.status_code == 200
     assert "removed" in response.json()["message"]
 
     # Verify list is empty
-    response = client.get("/words/me", headers=headers)
+    response = await client.get("/words/me", headers=headers)
     saved_list = response.json()["saved_words"]
     assert len(saved_list) == 0
 
 
-def test_analyze_text_structure(client: TestClient, seeded_session: Session):
+async def test_analyze_text_structure(client: AsyncClient, seeded_session: Session, fast_analyze):
     """Test that the analyze endpoint returns the correct JSON schema structure."""
     payload = {"text": "猫は食べている"}
-    response = client.post("/analyze", json=payload)
+    response = await client.post("/analyze", json=payload)
 
     assert response.status_code == 200
     data = response.json()
@@ -119,73 +176,54 @@ def test_analyze_text_structure(client: TestClient, seeded_session: Session):
     assert isinstance(stats["jr_difficulty"], (int, float))
 
 
-def test_search_and_filter(client: TestClient, seeded_session: Session):
+async def test_search_and_filter(client: AsyncClient, seeded_session: Session, auth_headers):
     """Test the Saved Words API search and filter parameters."""
-    # Setup User
-    client.post(
-        "/auth/register", json={"username": "searcher", "password": "password123"}
-    )
-    token = client.post(
-        "/auth/token", data={"username": "searcher", "password": "password123"}
-    ).json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers("searcher")
 
     # Save "猫"
-    client.post("/words/save", json={"word": "猫", "sentence": "ctx"}, headers=headers)
+    await client.post("/words/save", json={"word": "猫", "sentence": "ctx"}, headers=headers)
 
     # Test Search (Should find "猫")
-    res = client.get("/words/me?search=cat", headers=headers)  # Search by meaning "cat"
+    res = await client.get("/words/me?search=cat", headers=headers)  # Search by meaning "cat"
     assert len(res.json()["saved_words"]) == 1
     assert res.json()["saved_words"][0]["word"] == "猫"
 
     # Test Filter (N5)
-    res = client.get("/words/me?level=5", headers=headers)
+    res = await client.get("/words/me?level=5", headers=headers)
     assert len(res.json()["saved_words"]) == 1
 
     # Test Filter (N1 should be empty)
-    res = client.get("/words/me?level=1", headers=headers)
+    res = await client.get("/words/me?level=1", headers=headers)
     assert len(res.json()["saved_words"]) == 0
 
 
-def test_context_saving(client: TestClient, seeded_session: Session):
+async def test_context_saving(client: AsyncClient, seeded_session: Session, auth_headers):
     """Test that context sentences are correctly saved and retrieved with vocabulary."""
-    # Setup
-    client.post(
-        "/auth/register", json={"username": "ctx_user", "password": "password123"}
-    )
-    token = client.post(
-        "/auth/token", data={"username": "ctx_user", "password": "password123"}
-    ).json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers("ctx_user")
 
     # Save with context
     context = "This is a test sentence."
-    client.post(
+    await client.post(
         "/words/save", json={"word": "猫", "sentence": context}, headers=headers
     )
 
     # Verify
-    res = client.get("/words/me", headers=headers)
+    res = await client.get("/words/me", headers=headers)
     item = res.json()["saved_words"][0]
     assert item["context"] == context
     assert "created_at" in item
 
 
-def test_history_flow(client: TestClient, seeded_session: Session):
+async def test_history_flow(client: AsyncClient, seeded_session: Session, auth_headers, fast_analyze):
     """Test the full History lifecycle and its relationship with vocabulary.
 
     Flow: Analyze (Save History) -> Save Word (Link History) -> Delete History (Unlink Word).
     """
-    # Setup User
-    client.post("/auth/register", json={"username": "hist_user", "password": "pw"})
-    token = client.post(
-        "/auth/token", data={"username": "hist_user", "password": "pw"}
-    ).json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers("hist_user")
 
     # Analyze Text (Should Create History)
     text = "猫が好きです。"
-    res = client.post("/analyze", json={"text": text}, headers=headers)
+    res = await client.post("/analyze", json={"text": text}, headers=headers)
     assert res.status_code == 200
     data = res.json()
     history_id = data.get("history_id")
@@ -198,30 +236,30 @@ def test_history_flow(client: TestClient, seeded_session: Session):
         "sentence": "Context sentence",
         "history_id": history_id,
     }
-    client.post("/words/save", json=save_payload, headers=headers)
+    await client.post("/words/save", json=save_payload, headers=headers)
 
     # Verify Link Exists
-    res = client.get("/words/me", headers=headers)
+    res = await client.get("/words/me", headers=headers)
     saved_item = res.json()["saved_words"][0]
     assert saved_item["source_history_id"] == history_id
 
     # Verify History Listing
-    res = client.get("/history/me", headers=headers)
+    res = await client.get("/history/me", headers=headers)
     assert len(res.json()) == 1
     assert res.json()[0]["full_text"] == text
 
     # Delete History
-    res = client.delete(f"/history/{history_id}", headers=headers)
+    res = await client.delete(f"/history/{history_id}", headers=headers)
     assert res.status_code == 200
 
     # Verify word still exists but is unlinked
-    res = client.get("/words/me", headers=headers)
+    res = await client.get("/words/me", headers=headers)
     saved_item = res.json()["saved_words"][0]
     assert saved_item["word"] == "猫"
     assert saved_item["source_history_id"] is None
 
 
-def test_effective_frequency_logic(client: TestClient, seeded_session: Session):
+async def test_effective_frequency_logic(client: AsyncClient, seeded_session: Session, fast_analyze):
     """Test that a word with Rare Kanji but Common Kana is treated as Common.
 
     Ensures the analyzer picks the better frequency rank for statistics."""
@@ -241,7 +279,7 @@ def test_effective_frequency_logic(client: TestClient, seeded_session: Session):
 
     # Analyze text containing this word
     payload = {"text": "さて"}
-    res = client.post("/analyze", json=payload)
+    res = await client.post("/analyze", json=payload)
     data = res.json()
 
     # Verify API returns both frequencies
@@ -263,7 +301,7 @@ def test_effective_frequency_logic(client: TestClient, seeded_session: Session):
     assert point_1k["coverage"] == 100.0
 
 
-def test_analyze_freq_only_word(client: TestClient, seeded_session: Session):
+async def test_analyze_freq_only_word(client: AsyncClient, seeded_session: Session, fast_analyze):
     """Test analysis of words that exist in frequency lists but lack dictionary definitions.
 
     Ensures the system doesn't crash and returns available frequency data.
@@ -283,7 +321,7 @@ def test_analyze_freq_only_word(client: TestClient, seeded_session: Session):
 
     # Analyze text containing this word
     payload = {"text": "新しいボキャブラリー"}
-    response = client.post("/analyze", json=payload)
+    response = await client.post("/analyze", json=payload)
     assert response.status_code == 200
     data = response.json()
 
@@ -294,67 +332,72 @@ def test_analyze_freq_only_word(client: TestClient, seeded_session: Session):
     assert token["meanings"] == []
 
 
-def test_ocr_endpoint_missing_creds(client: TestClient):
-    """Test OCR endpoint when server credentials are not configured."""
-    with patch("app.main.get_vision_credentials", return_value=None):
-        # File upload
-        files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
-        response = client.post("/ocr", files=files)
-        assert response.status_code == 500
-        assert response.json()["detail"] == "Server OCR configuration missing"
+@pytest.fixture
+def vision_mock(monkeypatch) -> Dict[str, Any]:
+    """Installs fake Vision credentials and client for the OCR tests.
 
+    Tests adjust the returned holder instead of stacking patch() blocks:
+    "creds" is what get_vision_credentials returns, "response" is what
+    text_detection returns, and a non-None "error" is raised instead.
+    """
+    holder = {
+        "creds": SimpleNamespace(),
+        "response": SimpleNamespace(text_annotations=[]),
+        "error": None,
+    }
 
-def test_ocr_endpoint_success(client: TestClient):
-    """Test successful OCR processing."""
-    mock_creds = MagicMock()
-    with patch("app.main.get_vision_credentials", return_value=mock_creds):
-        with patch("google.cloud.vision.ImageAnnotatorClient") as MockClient:
-            mock_instance = MockClient.return_value
+    def text_detection(*args, **kwargs):
+        if holder["error"] is not None:
+            raise holder["error"]
+        return holder["response"]
 
-            # Mock response
-            mock_response = MagicMock()
-            mock_annotation = MagicMock()
-            mock_annotation.description = "Detected Text"
-            mock_response.text_annotations = [mock_annotation]
+    # Plain namespaces are all the endpoint needs; no MagicMock bookkeeping
+    fake_client = SimpleNamespace(text_detection=text_detection)
 
-            mock_instance.text_detection.return_value = mock_response
+    monkeypatch.setattr("app.main.get_vision_credentials", lambda: holder["creds"])
+    monkeypatch.setattr("google.cloud.vision.ImageAnnotatorClient", lambda *args, **kwargs: fake_client)
+    return holder
 
-            files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
-            response = client.post("/ocr", files=files)
 
-            assert response.status_code == 200
-            assert response.json() == {"text": "Detected Text"}
+async def test_ocr_endpoint_missing_creds(client: AsyncClient, vision_mock):
+    """Test OCR endpoint when server credentials are not configured."""
+    vision_mock["creds"] = None
 
+    # File upload
+    files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
+    response = await client.post("/ocr", files=files)
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Server OCR configuration missing"
 
-def test_ocr_endpoint_empty_result(client: TestClient):
-    """Test OCR endpoint when no text is detected."""
-    mock_creds = MagicMock()
-    with patch("app.main.get_vision_credentials", return_value=mock_creds):
-        with patch("google.cloud.vision.ImageAnnotatorClient") as MockClient:
-            mock_instance = MockClient.return_value
 
-            # Mock empty response
-            mock_response = MagicMock()
-            mock_response.text_annotations = []
-            mock_instance.text_detection.return_value = mock_response
+async def test_ocr_endpoint_success(client: AsyncClient, vision_mock):
+    """Test successful OCR processing."""
+    # Mock response
+    vision_mock["response"].text_annotations = [SimpleNamespace(description="Detected Text")]
+
+    files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
+    response = await client.post("/ocr", files=files)
+
+    assert response.status_code == 200
+    assert response.json() == {"text": "Detected Text"}
 
-            files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
-            response = client.post("/ocr", files=files)
 
-            assert response.status_code == 200
-            assert response.json() == {"text": ""}
+async def test_ocr_endpoint_empty_result(client: AsyncClient, vision_mock):
+    """Test OCR endpoint when no text is detected."""
+    # The default response has no text annotations
+    files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
+    response = await client.post("/ocr", files=files)
+
+    assert response.status_code == 200
+    assert response.json() == {"text": ""}
 
 
-def test_ocr_endpoint_error(client: TestClient):
+async def test_ocr_endpoint_error(client: AsyncClient, vision_mock):
     """Test OCR endpoint when Google API raises an exception."""
-    with patch("app.main.get_vision_credentials", return_value=MagicMock()):
-        with patch("google.cloud.vision.ImageAnnotatorClient") as MockClient:
-            MockClient.return_value.text_detection.side_effect = Exception(
-                "Google API Error"
-            )
+    vision_mock["error"] = Exception("Google API Error")
 
-            files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
-            response = client.post("/ocr", files=files)
+    files = {"file": ("test.jpg", b"fake content", "image/jpeg")}
+    response = await client.post("/ocr", files=files)
 
-            assert response.status_code == 500
-            assert response.json()["detail"] == "Failed to process image"
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Failed to process image"
@@ -1,22 +1,30 @@
 import os
 import json
 import base64
+import pytest
 from unittest.mock import patch, MagicMock
+from sqlmodel import select
 from app.services.analyzer_service import Analyzer
+from app.services.ingestion_service import ingest_series_stats
+from app.models.models import AnimeEpisode
 from app.core.gcp import get_vision_credentials
 
 # --- Analyzer Tests ---
 
 
-def test_analyzer_initialization():
+@pytest.fixture(scope="module")
+def analyzer() -> Analyzer:
+    """Shares one Analyzer across the analyzer tests in this module."""
+    return Analyzer()
+
+
+def test_analyzer_initialization(analyzer: Analyzer):
     """Test that the analyzer initializes the tokenizer."""
-    analyzer = Analyzer()
     assert analyzer.tokenizer_obj is not None
 
 
-def test_analyzer_ass_drawing_detection():
+def test_analyzer_ass_drawing_detection(analyzer: Analyzer):
     """Test detection of ASS subtitle drawing commands."""
-    analyzer = Analyzer()
     # Valid drawing commands
     assert analyzer._is_ass_drawing("m 0 0 l 100 100") is True
     assert analyzer._is_ass_drawing("b 10 10 20 20 30 30") is True
@@ -26,10 +34,8 @@ def test_analyzer_ass_drawing_detection():
     assert analyzer._is_ass_drawing("Hello World") is False
 
 
-def test_analyzer_chunking_and_filtering():
+def test_analyzer_chunking_and_filtering(analyzer: Analyzer):
     """Test text chunking for large inputs and ASS filtering."""
-    analyzer = Analyzer()
-
     # Test ASS filtering in get_tokens
     text_with_ass = "こんにちは\nm 0 0 l 10 10\n世界"
     tokens = analyzer.get_tokens(text_with_ass)
@@ -39,9 +45,9 @@ def test_analyzer_chunking_and_filtering():
     assert "m" not in surfaces  # Should be filtered out
 
     # Test Large Text Chunking
-    # Create text larger than MAX_BYTES (40000)
-    # "あ" is 3 bytes. 15000 chars * 3 = 45000 bytes.
-    long_text = "あ" * 15000
+    # Create text just larger than MAX_BYTES (40000)
+    # "あ" is 3 bytes. 13334 chars * 3 = 40002 bytes.
+    long_text = "あ" * ((40000 // 3) + 1)
     tokens = analyzer.get_tokens(long_text)
     assert len(tokens) > 0
     assert tokens[0]["surface"].startswith("あ")
@@ -51,12 +57,12 @@ def test_analyzer_chunking_and_filtering():
     assert analyzer.get_tokens("   ") == []
 
 
-def test_analyzer_error_handling():
+def test_analyzer_error_handling(analyzer: Analyzer, monkeypatch):
     """Test that analyzer returns empty list on internal error."""
-    analyzer = Analyzer()
-    # Mock tokenizer to raise exception
-    analyzer.tokenizer_obj = MagicMock()
-    analyzer.tokenizer_obj.tokenize.side_effect = Exception("Sudachi Error")
+    # Mock tokenizer to raise exception; monkeypatch restores the shared one
+    tokenizer = MagicMock()
+    tokenizer.tokenize.side_effect = Exception("Sudachi Error")
+    monkeypatch.setattr(analyzer, "tokenizer_obj", tokenizer)
 
     # Should return empty list on error
     assert analyzer.get_tokens("test") == []
@@ -82,3 +88,41 @@ def test_get_vision_credentials():
             mock_from.return_value = "mock_creds_obj"
             assert get_vision_credentials() == "mock_creds_obj"
             mock_from.assert_called_once_with(fake_creds)
+
+
+# --- Ingestion Tests ---
+
+
+def _episode_stats(total_words: int) -> dict:
+    """Builds a minimal stats dictionary as produced by the analysis pipeline."""
+    return {
+        "total_words": total_words,
+        "total_characters": total_words * 2,
+        "unique_words": 1,
+        "unique_words_once": 0,
+        "unique_kanji": 1,
+        "unique_kanji_once": 0,
+        "frequency_map": {"猫": total_words},
+        "_meta": {"filename": "01.ass"},
+    }
+
+
+def test_ingest_series_stats_bulk(session):
+    """Test bulk ingestion inserts new episodes and updates existing ones."""
+    series = ingest_series_stats(
+        session, [(1, _episode_stats(10)), (2, _episode_stats(20))], "テスト"
+    )
+    assert series.id is not None
+
+    # Re-ingest episode 2 with new stats and add episode 3
+    ingest_series_stats(
+        session, [(2, _episode_stats(30)), (3, _episode_stats(40))], "テスト"
+    )
+
+    episodes = session.exec(
+        select(AnimeEpisode).order_by(AnimeEpisode.episode_number)
+    ).all()
+    assert [e.episode_number for e in episodes] == [1, 2, 3]
+    assert [e.total_words for e in episodes] == [10, 30, 40]
+    assert episodes[0].frequency_map == {"猫": 10}
+    assert all(e.series_id == series.id for e in episodes)